@@ -0,0 +1,15 @@
+import sys
+from datetime import date, timedelta
+from railway_app import create_app
+from railway_app.utils import archive_runs, BOOKING_ARCHIVE, TRAIN_RUN_ARCHIVE
+
+app = create_app()
+
+# Usage: python archive_runs.py [days_to_keep]
+days_to_keep = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+cutoff = date.today() - timedelta(days=days_to_keep)
+
+with app.app_context():
+    print(f"🗄️ Archiving train runs departing before {cutoff:%d %b %Y}...")
+    archived = archive_runs(cutoff)
+    print(f"✅ Moved {archived} runs to '{TRAIN_RUN_ARCHIVE}' and their bookings to '{BOOKING_ARCHIVE}'.")
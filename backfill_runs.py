@@ -0,0 +1,14 @@
+import sys
+from datetime import date
+from railway_app import create_app
+from railway_app.utils import backfill_runs
+
+app = create_app()
+
+# Usage: python backfill_runs.py [YYYY-MM-DD]
+journey_date = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+
+with app.app_context():
+    print(f"🔁 Attaching bookings without a train run to runs on {journey_date:%d %b %Y}...")
+    runs = backfill_runs(journey_date)
+    print(f"✅ Backfilled and recounted {runs} train runs.")
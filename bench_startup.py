@@ -0,0 +1,51 @@
+import re
+import subprocess
+import sys
+import statistics
+
+# Usage: python bench_startup.py [runs] [budget_ms]
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+BUDGET_MS = float(sys.argv[2]) if len(sys.argv) > 2 else None
+# PIL is left out: mongoengine.fields imports it for ImageField whenever Pillow is installed
+DEFERRED_MODULES = ['qrcode', 'fpdf', 'flask_mail']
+
+# Mirrors what the Vercel entry point does on a cold start
+PROBE = (
+    "import sys; from app import app; "
+    f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+)
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+def measure():
+    """Runs one cold import under -X importtime and returns (total_us, top-level modules, eager heavy modules)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                            capture_output=True, text=True, check=True)
+    top_level = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # Only count outermost imports so nested modules are not double counted
+        if match and len(match.group(3)) == 1:
+            top_level[match.group(4)] = int(match.group(2))
+    eager = [m for m in result.stdout.strip().split(',') if m]
+    return sum(top_level.values()), top_level, eager
+
+totals = []
+for _ in range(RUNS):
+    total_us, top_level, eager = measure()
+    totals.append(total_us / 1000)
+
+median_ms = statistics.median(totals)
+print(f"⏱️ Cold import of app: median {median_ms:.1f} ms over {RUNS} runs (min {min(totals):.1f}, max {max(totals):.1f})")
+print("🐢 Slowest top-level imports:")
+for name, us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:10]:
+    print(f"   {us / 1000:8.1f} ms  {name}")
+
+failed = False
+if eager:
+    print(f"❌ Heavy modules imported at startup: {', '.join(eager)}")
+    failed = True
+if BUDGET_MS is not None and median_ms > BUDGET_MS:
+    print(f"❌ Median cold import {median_ms:.1f} ms exceeds budget of {BUDGET_MS:.1f} ms")
+    failed = True
+
+sys.exit(1 if failed else 0)
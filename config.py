@@ -6,8 +6,23 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-for-local-use')
     MONGODB_SETTINGS = {
-        'host': os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/railway_db')
+        'host': os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/railway_db'),
+        # Pool is per process; connect=False so gunicorn workers open their own after fork
+        'connect': False,
+        'maxPoolSize': int(os.environ.get('MONGODB_MAX_POOL_SIZE', 20)),
+        'minPoolSize': int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0)),
+        'maxIdleTimeMS': int(os.environ.get('MONGODB_MAX_IDLE_MS', 60000)),
+        'waitQueueTimeoutMS': int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 2000)),
+        'serverSelectionTimeoutMS': int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        'connectTimeoutMS': int(os.environ.get('MONGODB_CONNECT_TIMEOUT_MS', 5000)),
+        'socketTimeoutMS': int(os.environ.get('MONGODB_SOCKET_TIMEOUT_MS', 10000)),
+        'compressors': os.environ.get('MONGODB_COMPRESSORS', 'zlib'),
+        # Writes (e.g. submit_booking) default to the primary with majority acknowledgement
+        'w': 'majority',
+        'retryWrites': True
     }
+    # Staleness bound for reads routed to secondaries (MongoDB requires at least 90 seconds)
+    MONGODB_MAX_STALENESS_SECONDS = int(os.environ.get('MONGODB_MAX_STALENESS_SECONDS', 90))
     # Mail Settings
     MAIL_SERVER = 'smtp.gmail.com'
     MAIL_PORT = 465
@@ -16,6 +31,31 @@ class Config:
     MAIL_USE_TLS = False
     MAIL_USE_SSL = True
     
+    # Seconds before a worker rebuilds its in-memory train/station suggest index
+    SUGGEST_INDEX_TTL = int(os.environ.get('SUGGEST_INDEX_TTL', 300))
+
+    # Booking admission control (limits apply per worker process)
+    WAITLIST_CAP = int(os.environ.get('WAITLIST_CAP', 50))
+    BOOKING_RATE_PER_TRAIN = float(os.environ.get('BOOKING_RATE_PER_TRAIN', 5.0))
+    BOOKING_BURST_PER_TRAIN = int(os.environ.get('BOOKING_BURST_PER_TRAIN', 10))
+    BOOKING_CONCURRENCY_PER_TRAIN = int(os.environ.get('BOOKING_CONCURRENCY_PER_TRAIN', 2))
+    BOOKING_QUEUE_PER_TRAIN = int(os.environ.get('BOOKING_QUEUE_PER_TRAIN', 2))
+    BOOKING_QUEUE_TIMEOUT = float(os.environ.get('BOOKING_QUEUE_TIMEOUT', 3.0))
+    BOOKING_MAX_CONCURRENCY = int(os.environ.get('BOOKING_MAX_CONCURRENCY', 4))
+    # Requests waiting for any booking slot; each train may use BOOKING_QUEUE_PER_TRAIN of them.
+    # Keep running + waiting bookings well below gunicorn --threads
+    BOOKING_MAX_WAITING = int(os.environ.get('BOOKING_MAX_WAITING', 4))
+    BOOKING_SOLD_OUT_TTL = int(os.environ.get('BOOKING_SOLD_OUT_TTL', 30))
+
+    # Password hashing runs on a bounded pool; hashes with other parameters are upgraded on login.
+    # Each queued hash holds a request thread, so workers + queue plus the booking limits stay below --threads
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 4))
+    # Failed logins are counted per (username, client IP) in each worker process, not shared across workers
+    LOGIN_MAX_FAILURES = int(os.environ.get('LOGIN_MAX_FAILURES', 5))
+    LOGIN_LOCKOUT_SECONDS = int(os.environ.get('LOGIN_LOCKOUT_SECONDS', 300))
+
     # App Constants
     UPLOAD_FOLDER = 'static/uploads/profiles'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
\ No newline at end of file
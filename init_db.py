@@ -1,9 +1,9 @@
 import random
 import string
 import math
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from railway_app import create_app
-from models import db, Train, User, Booking, Passenger, Route
+from models import db, Train, TrainRun, User, Booking, Passenger, Route
 from railway_app.utils import generate_pnr, calculate_fare, generate_seat_number, SEATS_PER_COACH
 app = create_app()
 cities = ['New Delhi', 'Mumbai', 'Kolkata', 'Chennai', 'Bangalore', 'Hyderabad', 'Pune', 'Ahmedabad', 'Lucknow', 'Jaipur', 'Patna', 'Bhopal', 'Chandigarh']
@@ -24,6 +24,7 @@ with app.app_context():
     print("🧹 Clearing old database data...")
     User.drop_collection()
     Train.drop_collection()
+    TrainRun.drop_collection()
     Booking.drop_collection()
 
     # 2. Add Users
@@ -92,7 +93,11 @@ with app.app_context():
     # We will book random seats on random trains
     users = [admin, test_user]
     
+    journey_date = date.today()
     for train in all_trains:
+        # Bookings are seeded against today's run of each train
+        run = TrainRun(train=train, journey_date=journey_date, total_seats=train.total_seats).save()
+
         # Decide how full this train is (0% to 110% to simulate waitlists)
         fill_percentage = random.random() * 1.1 
         num_bookings_to_create = int(train.total_seats * fill_percentage)
@@ -137,6 +142,8 @@ with app.app_context():
             Booking(
                 pnr_number=generate_pnr(),
                 train=train,
+                run=run,
+                journey_date=journey_date,
                 user=user,
                 passenger_name=p_name,
                 passenger_age=p_age,
@@ -147,4 +154,11 @@ with app.app_context():
                 fare=calculate_fare(seat_class)
             ).save()
 
+        run.confirmed_count = current_confirmed
+        run.rac_count = current_rac
+        run.waitlist_count = current_wl
+        run.rac_issued = current_rac
+        run.waitlist_issued = current_wl
+        run.save()
+
     print(f"✅ Database initialized! Created {len(all_trains)} trains and thousands of bookings.")
\ No newline at end of file
@@ -0,0 +1,128 @@
+import argparse
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date
+from http.cookiejar import CookieJar
+
+# Usage: python load_test.py --source Mumbai --destination Pune --pnr <pnr> --train-id <id>
+#        python load_test.py --source Mumbai --destination Pune --pnr <pnr> --scenario login
+# Run against a server started with gunicorn (e.g. --threads 16) after `python init_db.py`.
+parser = argparse.ArgumentParser(description='Surge scenarios: measures /search and /pnr_status latency '
+                                             'before and during a flood of bookings on one train or of logins.')
+parser.add_argument('--scenario', choices=['booking', 'login'], default='booking')
+parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+parser.add_argument('--username', default='testuser')
+parser.add_argument('--password', default='password')
+parser.add_argument('--train-id', help='train to flood with bookings (booking scenario)')
+parser.add_argument('--source', required=True)
+parser.add_argument('--destination', required=True)
+parser.add_argument('--pnr', required=True)
+parser.add_argument('--journey-date', default=date.today().isoformat())
+parser.add_argument('--duration', type=float, default=15.0, help='seconds per phase')
+parser.add_argument('--readers', type=int, default=4)
+parser.add_argument('--flooders', type=int, default=32, help='concurrent booking or login clients')
+args = parser.parse_args()
+if args.scenario == 'booking' and not args.train_id:
+    parser.error('--train-id is required for the booking scenario')
+
+CSRF_TOKEN = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+def new_client():
+    """Returns an opener with its own cookie jar, i.e. its own session."""
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), NoRedirect())
+
+opener = new_client()
+
+def request(path, data=None, client=opener):
+    """Performs one request and returns (latency_seconds, status, redirect_location)."""
+    body = urllib.parse.urlencode(data).encode() if data is not None else None
+    started = time.perf_counter()
+    try:
+        with client.open(args.base_url + path, body) as response:
+            response.read()
+            status, location = response.status, None
+    except urllib.error.HTTPError as e:
+        status, location = e.code, e.headers.get('Location')
+    return time.perf_counter() - started, status, location
+
+def csrf_token(path, client=opener):
+    with client.open(args.base_url + path) as response:
+        return CSRF_TOKEN.search(response.read().decode()).group(1)
+
+token = csrf_token('/login')
+if args.scenario == 'booking':
+    request('/login', {'csrf_token': token, 'username': args.username, 'password': args.password})
+    token = csrf_token(f'/book/{args.train_id}?journey_date={args.journey_date}')
+
+def reader(stop, latencies):
+    search = {'csrf_token': token, 'source': args.source, 'destination': args.destination,
+              'journey_date': args.journey_date, 'time_filter': 'all'}
+    while not stop.is_set():
+        latencies['/search'].append(request('/search', search)[0])
+        latencies['/pnr_status'].append(request(f'/pnr_status?pnr={args.pnr}')[0])
+
+def booker(stop, outcomes, lock):
+    booking = {'csrf_token': token, 'train_id': args.train_id, 'journey_date': args.journey_date,
+               'email_address': 'loadtest@example.com', 'passenger_name': 'Load Test',
+               'passenger_age': 30, 'seat_class': 'Sleeper'}
+    while not stop.is_set():
+        latency, status, location = request('/submit_booking', booking)
+        outcome = 'booked' if location and '/confirmation/' in location else 'rejected' if status == 302 else f'HTTP {status}'
+        with lock:
+            outcomes.setdefault(outcome, []).append(latency)
+
+# Every login outcome redirects, so the flash message on the next page tells them apart
+LOGIN_OUTCOMES = [('Welcome back', 'logged in'), ('Login is busy', 'busy'),
+                  ('Too many failed attempts', 'locked'), ('Invalid credentials', 'rejected')]
+
+def login_outcome(location, client):
+    with client.open(urllib.parse.urljoin(args.base_url, location)) as response:
+        page = response.read().decode()
+    return next((outcome for text, outcome in LOGIN_OUTCOMES if text in page), 'other')
+
+def login_flooder(stop, outcomes, lock):
+    client = new_client()
+    login = {'csrf_token': csrf_token('/login', client), 'username': args.username, 'password': args.password}
+    while not stop.is_set():
+        latency, status, location = request('/login', login, client)
+        outcome = login_outcome(location, client) if status == 302 and location else f'HTTP {status}'
+        with lock:
+            outcomes.setdefault(outcome, []).append(latency)
+
+def run_phase(name, flooders):
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {'/search': [], '/pnr_status': []}
+    outcomes = {}
+    threads = [threading.Thread(target=reader, args=(stop, latencies)) for _ in range(args.readers)]
+    flood = booker if args.scenario == 'booking' else login_flooder
+    threads += [threading.Thread(target=flood, args=(stop, outcomes, lock)) for _ in range(flooders)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    flood_path = '/submit_booking' if args.scenario == 'booking' else '/login'
+    print(f"\n📊 {name} ({args.readers} readers, {flooders} {args.scenario} clients, {args.duration:.0f}s)")
+    for key, samples in outcomes.items():
+        print(f"   {flood_path} [{key}] throughput: {len(samples) / args.duration:.1f} req/s")
+    for endpoint, samples in list(latencies.items()) + [(f'{flood_path} [{k}]', v) for k, v in outcomes.items()]:
+        if len(samples) < 2:
+            continue
+        cuts = statistics.quantiles(samples, n=100)
+        print(f"   {endpoint:32} n={len(samples):6}  p50={cuts[49] * 1000:7.1f} ms  "
+              f"p95={cuts[94] * 1000:7.1f} ms  p99={cuts[98] * 1000:7.1f} ms")
+
+run_phase('Baseline', 0)
+run_phase(f'{args.scenario.capitalize()} surge', args.flooders)
@@ -30,6 +30,51 @@ class Train(db.Document):
     def id(self):
         return str(self.pk)
 
+class TrainRun(db.Document):
+    """Per-(train, date) inventory. Bookings are keyed by run so every hot-path
+    count touches a single day's data instead of the train's whole history.
+
+    The *_count fields count live bookings. Seat numbers freed by cancellations
+    wait in released_seats, and RAC/WL labels come from the *_issued counters,
+    so a label is never handed to two passengers."""
+    train = db.ReferenceField(Train, required=True)
+    journey_date = db.DateField(required=True)
+    total_seats = db.IntField(required=True)
+    confirmed_count = db.IntField(default=0)
+    rac_count = db.IntField(default=0)
+    waitlist_count = db.IntField(default=0)
+    rac_issued = db.IntField(default=0)
+    waitlist_issued = db.IntField(default=0)
+    released_seats = db.ListField(db.IntField())
+
+    meta = {
+        'indexes': [
+            {'fields': ('train', 'journey_date'), 'unique': True},
+            'journey_date'
+        ]
+    }
+
+    @classmethod
+    def for_date(cls, train, journey_date):
+        """Returns the run for a train on a date, creating it atomically if missing."""
+        # Counters are written on insert because range filters like confirmed_count__lt skip missing fields
+        return cls.objects(train=train, journey_date=journey_date).modify(
+            upsert=True, new=True, set_on_insert__total_seats=train.total_seats,
+            set_on_insert__confirmed_count=0, set_on_insert__rac_count=0, set_on_insert__waitlist_count=0,
+            set_on_insert__rac_issued=0, set_on_insert__waitlist_issued=0, set_on_insert__released_seats=[])
+
+    @property
+    def rac_capacity(self):
+        return self.total_seats // 10
+
+    @property
+    def available_seats(self):
+        return self.total_seats - self.confirmed_count
+
+    @property
+    def id(self):
+        return str(self.pk)
+
 class Passenger(db.EmbeddedDocument):
     name = db.StringField(required=True)
     age = db.IntField(required=True)
@@ -45,8 +90,8 @@ class User(db.Document):
     profile_picture = db.StringField()
     saved_passengers = db.ListField(db.EmbeddedDocumentField('Passenger'))
 
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password, method='pbkdf2:sha256'):
+        self.password_hash = generate_password_hash(password, method=method)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -58,6 +103,8 @@ class User(db.Document):
 class Booking(db.Document):
     pnr_number = db.StringField(unique=True, required=True)
     train = db.ReferenceField(Train, required=True)
+    run = db.ReferenceField(TrainRun)
+    journey_date = db.DateField()
     user = db.ReferenceField(User, required=True)
     passenger_name = db.StringField(required=True)
     passenger_age = db.IntField(required=True)
@@ -65,4 +112,11 @@ class Booking(db.Document):
     berth_preference = db.StringField()
     status = db.StringField(default='Confirmed')
     seat_number = db.StringField()
-    fare = db.FloatField(default=0.0)
\ No newline at end of file
+    fare = db.FloatField(default=0.0)
+
+    meta = {
+        'indexes': [
+            ('run', 'status'),
+            'user'
+        ]
+    }
@@ -0,0 +1,120 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pypdf import PdfWriter
+from railway_app import create_app
+from models import Train, TrainRun, Booking
+from railway_app.utils import ticket_from_booking, render_ticket_pdf
+
+CHUNK_SIZE = 50
+CHART_ROWS_PER_PAGE = 40
+CHART_COLUMNS = [('PNR', 'pnr', 35), ('Passenger', 'passenger_name', 50), ('Age', 'passenger_age', 12),
+                 ('Class', 'seat_class', 30), ('Seat', 'seat_number', 35), ('Status', 'status', 28)]
+
+def render_tickets(tickets, ticket_dir):
+    """Pool worker: writes one PDF per PNR and returns their paths in input order."""
+    paths = []
+    for ticket in tickets:
+        path = os.path.join(ticket_dir, f"ticket_{ticket['pnr']}.pdf")
+        render_ticket_pdf(ticket).output(path, 'F')
+        paths.append(path)
+    return paths
+
+def render_chart(train, journey_date, rows, path):
+    """Pool worker: writes the reservation chart, one table row per booking."""
+    from fpdf import FPDF
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    for start in range(0, max(len(rows), 1), CHART_ROWS_PER_PAGE):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 8, f"RESERVATION CHART - {train['train_name']}", 0, 1)
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(0, 6, f"{train['source']} -> {train['destination']} | {journey_date:%d %b %Y} "
+                       f"| Departs {train['departure_time']}", 0, 1)
+        pdf.ln(2)
+        pdf.set_font("Arial", "B", 9)
+        pdf.set_fill_color(230, 230, 230)
+        for title, _, width in CHART_COLUMNS:
+            pdf.cell(width, 6, title, 1, 0, 'L', True)
+        pdf.ln()
+        pdf.set_font("Arial", "", 9)
+        for row in rows[start:start + CHART_ROWS_PER_PAGE]:
+            for _, field, width in CHART_COLUMNS:
+                pdf.cell(width, 6, str(row[field] or '-'), 1)
+            pdf.ln()
+    pdf.output(path, 'F')
+    return path
+
+def stream_tickets(run, train):
+    """Yields chunks of ticket dicts for a run straight from a cursor, in allocation order."""
+    fields = ['pnr_number', 'passenger_name', 'passenger_age', 'berth_preference',
+              'status', 'seat_class', 'seat_number', 'fare', 'journey_date']
+    cursor = Booking._get_collection().find({'run': run.pk}, fields).sort('_id', 1).batch_size(CHUNK_SIZE)
+    chunk = []
+    for doc in cursor:
+        chunk.append(ticket_from_booking(doc, train))
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def main():
+    parser = argparse.ArgumentParser(description='Render all tickets and the reservation chart for a train run.')
+    parser.add_argument('train_id')
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(), help='journey date, YYYY-MM-DD')
+    parser.add_argument('--out', default='charts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        journey_date = args.date
+        train = Train.objects.get(id=args.train_id)
+        run = TrainRun.objects(train=train, journey_date=journey_date).first()
+        if not run:
+            print(f"❌ No bookings for {train.train_name} on {journey_date:%d %b %Y}.")
+            return
+
+        out_dir = os.path.join(args.out, f"{args.train_id}_{journey_date.isoformat()}")
+        ticket_dir = os.path.join(out_dir, 'tickets')
+        os.makedirs(ticket_dir, exist_ok=True)
+        train_info = {'train_name': train.train_name, 'source': train.source,
+                      'destination': train.destination, 'departure_time': train.departure_time}
+
+        print(f"🖨️ Preparing chart for {train.train_name} on {journey_date:%d %b %Y} with {args.workers} workers...")
+        started = time.perf_counter()
+        rows = []
+        # Spawned workers never inherit the parent's MongoClient, which is unsafe to fork
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            ticket_jobs = []
+            for chunk in stream_tickets(run, train):
+                rows.extend(chunk)
+                ticket_jobs.append(pool.submit(render_tickets, chunk, ticket_dir))
+            chart_job = pool.submit(render_chart, train_info, journey_date, rows,
+                                    os.path.join(out_dir, 'chart.pdf'))
+            ticket_paths = [path for job in ticket_jobs for path in job.result()]
+            chart_path = chart_job.result()
+        rendered = time.perf_counter() - started
+
+        # Chart first, then every ticket in allocation order
+        merged_path = os.path.join(out_dir, 'chart_and_tickets.pdf')
+        writer = PdfWriter()
+        for path in [chart_path] + ticket_paths:
+            writer.append(path)
+        with open(merged_path, 'wb') as merged:
+            writer.write(merged)
+        elapsed = time.perf_counter() - started
+
+        rate = len(ticket_paths) / rendered if rendered else 0.0
+        print(f"✅ Rendered {len(ticket_paths)} tickets in {rendered:.2f}s "
+              f"({rate:.1f} tickets/s, {rate / args.workers:.1f} tickets/s per core); "
+              f"merged in {elapsed - rendered:.2f}s.")
+        print(f"📄 Merged PDF: {merged_path}")
+        print(f"📁 Per-PNR tickets: {ticket_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,47 @@
-from flask import Flask
-from flask_mail import Mail
+from flask import Flask, current_app
+from mongoengine import register_connection, DEFAULT_CONNECTION_NAME
 from models import db
 from config import Config
 from flask_wtf.csrf import CSRFProtect
 
-mail = Mail()
 csrf = CSRFProtect()
 
+# MongoDB rejects maxStalenessSeconds below 90; -1 means no bound
+MIN_MAX_STALENESS_SECONDS = 90
+
+def init_db(app):
+    """Registers MongoDB settings without connecting; mongoengine opens the client on first query."""
+    staleness = app.config['MONGODB_MAX_STALENESS_SECONDS']
+    if staleness != -1 and staleness < MIN_MAX_STALENESS_SECONDS:
+        # Fail at startup rather than on every secondary read
+        raise ValueError(f"MONGODB_MAX_STALENESS_SECONDS must be -1 or at least {MIN_MAX_STALENESS_SECONDS}, got {staleness}")
+    settings = dict(app.config['MONGODB_SETTINGS'])
+    alias = settings.pop('alias', DEFAULT_CONNECTION_NAME)
+    register_connection(alias, **settings)
+
+def get_mail():
+    """Returns the Flask-Mail state for the current app, importing Flask-Mail on first use."""
+    if 'mail' not in current_app.extensions:
+        from flask_mail import Mail
+        Mail().init_app(current_app)
+    return current_app.extensions['mail']
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # Initialize Extensions
-    db.init_app(app)
-    mail.init_app(app)
+    # Initialize Extensions (PDF, QR and mail dependencies are imported on first use)
+    init_db(app)
     csrf.init_app(app)
 
+    from .suggest import suggest_index
+    from .admission import booking_admission
+    from .passwords import password_hasher, login_throttle
+    suggest_index.ttl_seconds = app.config['SUGGEST_INDEX_TTL']
+    booking_admission.configure(app.config)
+    password_hasher.configure(app.config)
+    login_throttle.configure(app.config)
+
     # Register Blueprints
     from .routes.main import main_bp
     from .routes.auth import auth_bp
@@ -27,4 +53,4 @@ def create_app():
     app.register_blueprint(booking_bp)
     app.register_blueprint(admin_bp)
 
-    return app
\ No newline at end of file
+    return app
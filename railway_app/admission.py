@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_SOLD_OUT_ENTRIES = 10000
+
+class AdmissionRejected(Exception):
+    """Raised when a booking request is turned away before touching the database."""
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class TrainLane:
+    """Per-train rate limit plus a bounded queue in front of a small number of booking slots."""
+
+    def __init__(self, rate, burst, concurrency, queue_size):
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.queue_size = queue_size
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+class BookingAdmission:
+    """Admission control for the booking path.
+
+    Each train gets its own lane so a surge on one train cannot starve bookings
+    on others: a train may queue at most BOOKING_QUEUE_PER_TRAIN requests, a
+    fraction of the process-wide BOOKING_MAX_WAITING budget. That budget plus a
+    cap on running bookings keeps booking from occupying every worker thread, so
+    /search and /pnr_status stay responsive. Limits are per worker process and
+    need a threaded worker (gunicorn gthread); with sync workers each process
+    handles one request anyway.
+    """
+
+    def __init__(self):
+        self._lanes = {}
+        self._lanes_lock = threading.Lock()
+        self._sold_out = OrderedDict()
+        self._sold_out_lock = threading.Lock()
+        self.configure({})
+
+    def configure(self, config):
+        self.rate = config.get('BOOKING_RATE_PER_TRAIN', 5.0)
+        self.burst = config.get('BOOKING_BURST_PER_TRAIN', 10)
+        self.concurrency = config.get('BOOKING_CONCURRENCY_PER_TRAIN', 2)
+        self.queue_size = config.get('BOOKING_QUEUE_PER_TRAIN', 2)
+        self.queue_timeout = config.get('BOOKING_QUEUE_TIMEOUT', 3.0)
+        self.sold_out_ttl = config.get('BOOKING_SOLD_OUT_TTL', 30)
+        self._global_slots = threading.BoundedSemaphore(config.get('BOOKING_MAX_CONCURRENCY', 4))
+        self._waiting_slots = threading.BoundedSemaphore(config.get('BOOKING_MAX_WAITING', 4))
+        self._lanes = {}
+
+    def _lane(self, train_id):
+        with self._lanes_lock:
+            lane = self._lanes.get(train_id)
+            if lane is None:
+                lane = TrainLane(self.rate, self.burst, self.concurrency, self.queue_size)
+                self._lanes[train_id] = lane
+            return lane
+
+    def is_sold_out(self, train_id, journey_date):
+        expires = self._sold_out.get((train_id, journey_date))
+        return expires is not None and time.monotonic() < expires
+
+    def mark_sold_out(self, train_id, journey_date):
+        # Entries expire so seats released in other worker processes become bookable again
+        with self._sold_out_lock:
+            self._sold_out.pop((train_id, journey_date), None)
+            self._sold_out[(train_id, journey_date)] = time.monotonic() + self.sold_out_ttl
+            while len(self._sold_out) > MAX_SOLD_OUT_ENTRIES:
+                self._sold_out.popitem(last=False)
+
+    def clear_sold_out(self, train_id, journey_date):
+        with self._sold_out_lock:
+            self._sold_out.pop((train_id, journey_date), None)
+
+    def _wait_for(self, semaphore, deadline, holds_waiting_slot):
+        """Blocks on a slot until the deadline, taking a waiting slot first unless one is already held.
+        Returns (acquired, holds_waiting_slot)."""
+        if not holds_waiting_slot:
+            # Fail fast once too many threads in this process are already waiting for any train
+            if not self._waiting_slots.acquire(blocking=False):
+                raise AdmissionRejected('Booking service is busy. Please try again shortly.')
+            holds_waiting_slot = True
+        return semaphore.acquire(timeout=max(0, deadline - time.monotonic())), holds_waiting_slot
+
+    @contextmanager
+    def admit(self, train_id, journey_date):
+        """Holds a booking slot for the train, or raises AdmissionRejected.
+
+        Free slots are taken without waiting; only requests that would block use
+        the train's queue and the process-wide waiting budget.
+        """
+        if self.is_sold_out(train_id, journey_date):
+            raise AdmissionRejected('This train is sold out for the selected date, including the waitlist.')
+
+        lane = self._lane(train_id)
+        if not lane.bucket.take():
+            raise AdmissionRejected('High demand for this train. Please try again in a few seconds.')
+
+        deadline = time.monotonic() + self.queue_timeout
+        lane_acquired = waiting = False
+        try:
+            lane_acquired = lane.slots.acquire(blocking=False)
+            if not lane_acquired:
+                with lane.lock:
+                    if lane.waiting >= lane.queue_size:
+                        raise AdmissionRejected('Booking queue for this train is full. Please try again shortly.')
+                    lane.waiting += 1
+                try:
+                    lane_acquired, waiting = self._wait_for(lane.slots, deadline, waiting)
+                finally:
+                    with lane.lock:
+                        lane.waiting -= 1
+                if not lane_acquired:
+                    raise AdmissionRejected('Booking queue for this train timed out. Please try again shortly.')
+            if not self._global_slots.acquire(blocking=False):
+                global_acquired, waiting = self._wait_for(self._global_slots, deadline, waiting)
+                if not global_acquired:
+                    raise AdmissionRejected('Booking service is busy. Please try again shortly.')
+        except AdmissionRejected:
+            if lane_acquired:
+                lane.slots.release()
+            raise
+        finally:
+            if waiting:
+                self._waiting_slots.release()
+
+        try:
+            yield
+        finally:
+            self._global_slots.release()
+            lane.slots.release()
+
+booking_admission = BookingAdmission()
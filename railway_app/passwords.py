@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_TRACKED_CLIENTS = 10000
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full, so the request can fail fast instead of piling up."""
+
+class PasswordHasher:
+    """Runs PBKDF2 on a small dedicated pool so login bursts cannot take every worker's CPU.
+
+    hashlib releases the GIL while deriving keys, so a thread pool is enough to
+    cap hashing at `workers` cores while request threads wait on the result.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self.configure({})
+
+    def configure(self, config):
+        self.iterations = config.get('PASSWORD_HASH_ITERATIONS', 600000)
+        self.method = f"pbkdf2:sha256:{self.iterations}"
+        self.workers = config.get('PASSWORD_HASH_WORKERS', 2)
+        self._slots = threading.BoundedSemaphore(self.workers + config.get('PASSWORD_HASH_QUEUE', 4))
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            # Created on first use so the pool is started in each worker after fork
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            return self._executor.submit(fn, *args, **kwargs).result()
+        finally:
+            self._slots.release()
+
+    def set_password(self, user, password):
+        self._run(user.set_password, password, method=self.method)
+
+    def check_password(self, user, password):
+        return self._run(user.check_password, password)
+
+    def needs_rehash(self, user):
+        """True when the stored hash uses another algorithm or fewer iterations than configured.
+        Stronger hashes are left alone so lowering the setting never weakens them."""
+        algorithm, _, iterations = user.password_hash.split('$', 1)[0].rpartition(':')
+        if algorithm != 'pbkdf2:sha256' or not iterations.isdigit():
+            return True
+        return int(iterations) < self.iterations
+
+class LoginThrottle:
+    """Cheap rejection path for repeated failed password checks.
+
+    Failures are keyed on (username, client IP), so one client cannot lock an
+    account for everyone else. State is per worker process, so the effective
+    limit is LOGIN_MAX_FAILURES times the number of processes.
+    """
+
+    def __init__(self):
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+        self.configure({})
+
+    def configure(self, config):
+        self.max_failures = config.get('LOGIN_MAX_FAILURES', 5)
+        self.lockout_seconds = config.get('LOGIN_LOCKOUT_SECONDS', 300)
+
+    def is_locked(self, username, client_ip):
+        failures, last_failed = self._failures.get((username, client_ip), (0, 0))
+        return failures >= self.max_failures and time.monotonic() - last_failed < self.lockout_seconds
+
+    def record_failure(self, username, client_ip):
+        key = (username, client_ip)
+        with self._lock:
+            failures, last_failed = self._failures.pop(key, (0, 0))
+            if time.monotonic() - last_failed >= self.lockout_seconds:
+                failures = 0
+            self._failures[key] = (failures + 1, time.monotonic())
+            while len(self._failures) > MAX_TRACKED_CLIENTS:
+                self._failures.popitem(last=False)
+
+    def reset(self, username, client_ip):
+        with self._lock:
+            self._failures.pop((username, client_ip), None)
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
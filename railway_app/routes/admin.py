@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from models import Train, Booking
+from ..utils import secondary_reads
+from ..suggest import suggest_index
 import math
 
 admin_bp = Blueprint('admin', __name__)
@@ -9,11 +11,12 @@ def admin_dashboard():
     if not session.get('is_admin'): return redirect(url_for('auth.login'))
     
     page = request.args.get('page', 1, type=int)
-    bookings = Booking.objects().order_by('-id').skip((page - 1) * 10).limit(10)
-    trains = Train.objects().order_by('train_name')
+    reads = secondary_reads()
+    bookings = Booking.objects().read_preference(reads).order_by('-id').skip((page - 1) * 10).limit(10)
+    trains = Train.objects().read_preference(reads).order_by('train_name')
     
     return render_template('admin_dashboard.html', bookings=bookings, trains=trains, 
-                           page=page, total_pages=math.ceil(Booking.objects.count() / 10))
+                           page=page, total_pages=math.ceil(Booking.objects.read_preference(reads).count() / 10))
 
 @admin_bp.route('/admin/add_train', methods=['POST'])
 def add_train():
@@ -23,5 +26,6 @@ def add_train():
         destination=request.form['destination'], departure_time=request.form['departure_time'],
         total_seats=int(request.form['total_seats'])
     ).save()
+    suggest_index.refresh()
     flash('Train added.', 'success')
     return redirect(url_for('admin.admin_dashboard'))
\ No newline at end of file
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import User, Booking, Passenger
+from ..passwords import password_hasher, login_throttle, PasswordHasherBusy
+from ..utils import release_bookings
 import sys
 
 auth_bp = Blueprint('auth', __name__)
@@ -21,10 +22,13 @@ def signup():
         
         new_user = User(username=username, email=request.form.get('email'), 
                         phone_number=request.form.get('phone'))
-        new_user.set_password(password)
+        password_hasher.set_password(new_user, password)
         new_user.save()
         flash('Account created successfully!', 'success')
         return redirect(url_for('main.index'))
+    except PasswordHasherBusy:
+        flash('Signup is busy right now. Please try again in a moment.', 'warning')
+        return redirect(url_for('main.index'))
     except Exception as e:
         print(f"Signup Error: {e}", file=sys.stderr)
         flash('An error occurred during signup.', 'danger')
@@ -36,17 +40,30 @@ def login():
         try:
             username = request.form.get('username')
             password = request.form.get('password')
+
+            # Locked-out usernames are rejected before any hashing work
+            if login_throttle.is_locked(username, request.remote_addr):
+                flash('Too many failed attempts. Please try again later.', 'danger')
+                return redirect(url_for('main.index'))
             
             user = User.objects(username=username).first()
-            if user and user.check_password(password):
+            if user and password_hasher.check_password(user, password):
+                login_throttle.reset(username, request.remote_addr)
+                if password_hasher.needs_rehash(user):
+                    password_hasher.set_password(user, password)
+                    user.save()
                 session['logged_in'] = True
                 session['user_id'] = str(user.id)
                 session['username'] = user.username
                 session['is_admin'] = (user.role == 'admin')
                 flash(f'Welcome back, {user.username}!', 'success')
             else:
+                login_throttle.record_failure(username, request.remote_addr)
                 flash('Invalid credentials.', 'danger')
             return redirect(url_for('main.index'))
+        except PasswordHasherBusy:
+            flash('Login is busy right now. Please try again in a moment.', 'warning')
+            return redirect(url_for('main.index'))
         except Exception as e:
             print(f"Login Error: {e}", file=sys.stderr)
             flash('An error occurred during login. Check database connection.', 'danger')
@@ -101,21 +118,27 @@ def profile():
 def change_password():
     if not session.get('logged_in'): return redirect(url_for('auth.login'))
     user = User.objects.get(id=session['user_id'])
-    if not user.check_password(request.form['current_password']):
-        flash('Incorrect current password.', 'danger')
-    elif request.form['new_password'] != request.form['confirm_password']:
-        flash('Passwords do not match.', 'danger')
-    else:
-        user.set_password(request.form['new_password'])
-        user.save()
-        flash('Password updated.', 'success')
+    try:
+        if login_throttle.is_locked(user.username, request.remote_addr):
+            flash('Too many failed attempts. Please try again later.', 'danger')
+        elif not password_hasher.check_password(user, request.form['current_password']):
+            login_throttle.record_failure(user.username, request.remote_addr)
+            flash('Incorrect current password.', 'danger')
+        elif request.form['new_password'] != request.form['confirm_password']:
+            flash('Passwords do not match.', 'danger')
+        else:
+            password_hasher.set_password(user, request.form['new_password'])
+            user.save()
+            flash('Password updated.', 'success')
+    except PasswordHasherBusy:
+        flash('Password service is busy right now. Please try again in a moment.', 'warning')
     return redirect(url_for('auth.profile'))
 
 @auth_bp.route('/profile/delete', methods=['POST'])
 def delete_account():
     if not session.get('logged_in'): return redirect(url_for('auth.login'))
     user = User.objects.get(id=session['user_id'])
-    Booking.objects(user=user).delete()
+    release_bookings(Booking.objects(user=user))
     user.delete()
     session.clear()
     flash('Account deleted.', 'info')
@@ -1,12 +1,10 @@
-import os
-import tempfile
-import base64
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, make_response
-from models import Train, Booking, User, Passenger
-from ..utils import (generate_pnr, calculate_fare, generate_seat_number, 
-                     send_ticket_email, generate_qr_code)
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, make_response, abort
+from models import Train, TrainRun, Booking, User, Passenger
+from ..utils import (generate_pnr, calculate_fare, parse_journey_date, reserve_seat,
+                     send_ticket_email, generate_qr_code, secondary_reads, find_booking,
+                     ticket_from_booking, render_ticket_pdf)
+from ..admission import booking_admission, AdmissionRejected
 from datetime import datetime
-from fpdf import FPDF
 
 booking_bp = Blueprint('booking', __name__)
 
@@ -17,16 +15,30 @@ def book(train_id):
         return redirect(url_for('auth.login'))
     
     train_to_book = Train.objects.get_or_404(id=train_id)
+    journey_date = parse_journey_date(request.args.get('journey_date'))
+    if journey_date is None:
+        flash('Please choose a valid travel date from today onwards.', 'danger')
+        return redirect(url_for('main.index'))
     user = User.objects.get(id=session['user_id'])
-    return render_template('booking_form.html', train=train_to_book, saved_passengers=user.saved_passengers)
+    return render_template('booking_form.html', train=train_to_book, journey_date=journey_date,
+                           saved_passengers=user.saved_passengers)
 
 @booking_bp.route('/submit_booking', methods=['POST'])
 def submit_booking():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
 
-    user = User.objects.get(id=session['user_id'])
     train_id = request.form.get('train_id')
+    journey_date = parse_journey_date(request.form.get('journey_date'))
+    if journey_date is None:
+        flash('Please choose a valid travel date from today onwards.', 'danger')
+        return redirect(url_for('main.index'))
+    # Sold-out runs are turned away before any database work
+    if booking_admission.is_sold_out(train_id, journey_date):
+        flash('This train is sold out for the selected date, including the waitlist.', 'danger')
+        return redirect(url_for('main.index'))
+
+    user = User.objects.get(id=session['user_id'])
     train_to_book = Train.objects.get(id=train_id)
     
     passenger_name = request.form.get('passenger_name')
@@ -36,28 +48,27 @@ def submit_booking():
     save_passenger_flag = request.form.get('save_passenger')
     email = request.form.get('email_address') or user.email
 
-    # Calculate Status (Confirmed/RAC/Waitlisted)
-    confirmed_bookings = Booking.objects(train=train_to_book, status='Confirmed').count()
-    rac_bookings = Booking.objects(train=train_to_book, status='RAC').count()
-    waitlisted_bookings = Booking.objects(train=train_to_book, status='Waitlisted').count()
-
-    status = 'Confirmed'
-    seat_number = None
-    rac_limit = train_to_book.total_seats + (train_to_book.total_seats // 10) 
-    
-    if confirmed_bookings < train_to_book.total_seats:
-        status = 'Confirmed'
-        seat_number = generate_seat_number(confirmed_bookings + 1, train_to_book.total_seats, seat_class)
-    elif confirmed_bookings + rac_bookings < rac_limit:
-        status = 'RAC'
-        seat_number = f"RAC-{rac_bookings + 1}"
-    else:
-        status = 'Waitlisted'
-        seat_number = f"WL-{waitlisted_bookings + 1}"
+    # Calculate Status (Confirmed/RAC/Waitlisted) from this run's counters, behind per-train admission control.
+    # Inventory stays on the primary so seat counters are never read stale.
+    try:
+        with booking_admission.admit(train_id, journey_date):
+            run = TrainRun.for_date(train_to_book, journey_date)
+            reserved = reserve_seat(run, seat_class)
+    except AdmissionRejected as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('booking.book', train_id=train_id, journey_date=journey_date.isoformat()))
+
+    if reserved is None:
+        booking_admission.mark_sold_out(train_id, journey_date)
+        flash('This train is sold out for the selected date, including the waitlist.', 'danger')
+        return redirect(url_for('booking.book', train_id=train_id, journey_date=journey_date.isoformat()))
+    status, seat_number = reserved
 
     new_booking = Booking(
         pnr_number=generate_pnr(),
         train=train_to_book,
+        run=run,
+        journey_date=journey_date,
         user=user,
         passenger_name=passenger_name,
         passenger_age=passenger_age,
@@ -78,6 +89,7 @@ def submit_booking():
     ticket_details = {
         'pnr': new_booking.pnr_number, 'passenger_name': passenger_name, 'passenger_age': passenger_age,
         'train_name': train_to_book.train_name, 'route': f"{train_to_book.source} ➝ {train_to_book.destination}",
+        'journey_date': journey_date.strftime("%d %b %Y"),
         'departure_time': train_to_book.departure_time, 'seat_number': seat_number,
         'seat_class': seat_class, 'status': status, 'fare': f"₹{new_booking.fare:.2f}",
         'booking_date': datetime.now().strftime("%d %b %Y")
@@ -88,14 +100,14 @@ def submit_booking():
 
 @booking_bp.route('/confirmation/<pnr>')
 def booking_confirmation(pnr):
-    booking = Booking.objects.get_or_404(pnr_number=pnr)
+    booking = find_booking(pnr) or abort(404)
     return render_template('booking_confirmation.html', booking=booking)
 
 @booking_bp.route('/pnr_status')
 def pnr_status():
     pnr = request.args.get('pnr', '').strip()
     if not pnr: return redirect(url_for('main.index'))
-    booking = Booking.objects(pnr_number=pnr).first()
+    booking = find_booking(pnr, secondary_reads())
     if booking:
         return render_template('ticket_details.html', booking=booking)
     flash('Invalid PNR Number.', 'danger')
@@ -113,111 +125,8 @@ def my_bookings():
 
 @booking_bp.route('/download_ticket/<pnr>')
 def download_ticket(pnr):
-    booking = Booking.objects.get_or_404(pnr_number=pnr)
-    
-    # Restored Original PDF Settings from app.py
-    pdf = FPDF(orientation='P', unit='mm', format='A4')
-    pdf.add_page()
-    
-    BLUE_HEADER = (13, 71, 161)
-    TEXT_COLOR = (50, 50, 50)
-    GREEN_PRICE = (46, 125, 50)
-    
-    # Blue Header Rectangle
-    pdf.set_fill_color(*BLUE_HEADER)
-    pdf.rect(10, 10, 190, 30, 'F')
-    
-    # Header Text
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_font("Arial", "B", 20)
-    pdf.set_xy(20, 20)
-    pdf.cell(0, 0, "RAILWAY E-TICKET")
-    
-    # PNR Section
-    pdf.set_font("Arial", "", 12)
-    pdf.set_xy(140, 18)
-    pdf.cell(50, 5, "PNR NUMBER", 0, 1, 'R')
-    pdf.set_font("Arial", "B", 16)
-    pdf.set_xy(140, 24)
-    pdf.cell(50, 5, booking.pnr_number, 0, 1, 'R')
-    
-    # Main Content Border
-    pdf.set_draw_color(200, 200, 200)
-    pdf.rect(10, 40, 190, 110)
-    
-    pdf.set_text_color(*TEXT_COLOR)
-    y_start = 55
-    x_left = 20
-    
-    # Passenger Details Section
-    pdf.set_font("Arial", "B", 12)
-    pdf.set_xy(x_left, y_start)
-    pdf.set_text_color(*BLUE_HEADER)
-    pdf.cell(0, 10, "PASSENGER DETAILS")
-    pdf.line(x_left, y_start+8, 90, y_start+8)
-    
-    pdf.set_text_color(*TEXT_COLOR)
-    details_left = [
-        ("Name", booking.passenger_name),
-        ("Age", f"{booking.passenger_age} Years"),
-        ("Berth", booking.berth_preference or 'No Preference'),
-        ("Status", booking.status)
-    ]
-    
-    y_pos = y_start + 15
-    for label, value in details_left:
-        pdf.set_font("Arial", "B", 10)
-        pdf.set_xy(x_left, y_pos)
-        pdf.cell(30, 6, f"{label}:")
-        pdf.set_font("Arial", "", 10)
-        pdf.cell(40, 6, str(value))
-        y_pos += 8
-
-    # Journey Details Section
-    x_right = 110
-    pdf.set_font("Arial", "B", 12)
-    pdf.set_xy(x_right, y_start)
-    pdf.set_text_color(*BLUE_HEADER)
-    pdf.cell(0, 10, "JOURNEY DETAILS")
-    pdf.line(x_right, y_start+8, 180, y_start+8)
-    
-    pdf.set_text_color(*TEXT_COLOR)
-    details_right = [
-        ("Train", booking.train.train_name),
-        ("Route", f"{booking.train.source} -> {booking.train.destination}"),
-        ("Class", booking.seat_class),
-        ("Seat No", booking.seat_number or 'Allocated later')
-    ]
-    
-    y_pos = y_start + 15
-    for label, value in details_right:
-        pdf.set_font("Arial", "B", 10)
-        pdf.set_xy(x_right, y_pos)
-        pdf.cell(30, 6, f"{label}:")
-        pdf.set_font("Arial", "", 10)
-        pdf.cell(40, 6, str(value))
-        y_pos += 8
-        
-    # QR Code handling (using original temp file logic)
-    qr_data = f"PNR:{booking.pnr_number}|{booking.passenger_name}|{booking.train.train_name}"
-    qr_base64 = generate_qr_code(qr_data)
-    qr_bytes = base64.b64decode(qr_base64)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_qr:
-        temp_qr.write(qr_bytes)
-        temp_qr_path = temp_qr.name
-    
-    pdf.image(temp_qr_path, x=85, y=105, w=35)
-    os.remove(temp_qr_path)
-    
-    # Fare Footer
-    pdf.set_fill_color(240, 240, 240)
-    pdf.rect(11, 138, 188, 11, 'F')
-    pdf.set_xy(10, 140)
-    pdf.set_font("Arial", "B", 12)
-    pdf.set_text_color(*GREEN_PRICE)
-    # FIX: Changed ₹ to Rs. to avoid encoding error
-    pdf.cell(190, 8, f"TOTAL FARE: Rs. {booking.fare:.2f}", 0, 0, 'C')
+    booking = find_booking(pnr) or abort(404)
+    pdf = render_ticket_pdf(ticket_from_booking(booking))
 
     # Output response
     pdf_output = pdf.output(dest='S').encode('latin-1')
@@ -227,16 +136,20 @@ def download_ticket(pnr):
     return response
 @booking_bp.route('/print_ticket/<pnr>')
 def print_ticket(pnr):
-    booking = Booking.objects.get_or_404(pnr_number=pnr)
+    booking = find_booking(pnr) or abort(404)
     qr_data = f"PNR: {booking.pnr_number}\nName: {booking.passenger_name}\nTrain: {booking.train.train_name}"
     qr_base64 = generate_qr_code(qr_data)
     return render_template('print_ticket.html', booking=booking, qr_code=qr_base64)
 
 @booking_bp.route('/book_return/<pnr>')
 def book_return(pnr):
-    booking = Booking.objects.get_or_404(pnr_number=pnr)
+    booking = find_booking(pnr) or abort(404)
     return_train = Train.objects(source__iexact=booking.train.destination, destination__iexact=booking.train.source).first()
     if return_train:
-        return redirect(url_for('booking.book', train_id=str(return_train.id)))
+        # Outbound date as the default; past dates fall back to today on the form
+        journey_date = booking.journey_date.strftime('%Y-%m-%d') if booking.journey_date else None
+        if journey_date and parse_journey_date(journey_date) is None:
+            journey_date = None
+        return redirect(url_for('booking.book', train_id=str(return_train.id), journey_date=journey_date))
     flash('No return train found.', 'danger')
     return redirect(url_for('booking.booking_confirmation', pnr=pnr))
\ No newline at end of file
@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import Train, Booking
-from ..utils import calculate_travel_time
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from models import Train, TrainRun
+from ..utils import calculate_travel_time, parse_journey_date, secondary_reads
+from ..suggest import suggest_index
 
 main_bp = Blueprint('main', __name__)
 
@@ -11,10 +12,14 @@ def index():
 
 @main_bp.route('/search', methods=['POST'])
 def search():
-    """Optimized search using Database-level filtering and Aggregation for seat counts."""
+    """Optimized search using Database-level filtering and per-date run counters for seat counts."""
     source = request.form.get('source', '').strip()
     destination = request.form.get('destination', '').strip()
     time_filter = request.form.get('time_filter', 'all')
+    journey_date = parse_journey_date(request.form.get('journey_date'))
+    if journey_date is None:
+        flash('Please choose a valid travel date from today onwards.', 'danger')
+        return redirect(url_for('main.index'))
 
     query = {
         'source__iexact': source,
@@ -31,31 +36,31 @@ def search():
         query['departure_time__gte'] = '17:00'
         query['departure_time__lt'] = '24:00'
 
-    trains = list(Train.objects(**query))
+    trains = list(Train.objects(**query).read_preference(secondary_reads()))
     
     if not trains:
-        return render_template('results.html', trains=[], source=source, destination=destination)
+        return render_template('results.html', trains=[], source=source, destination=destination,
+                               journey_date=journey_date)
 
     train_ids = [t.pk for t in trains]
     
-    pipeline = [
-        {"$match": {"train": {"$in": train_ids}, "status": "Confirmed"}},
-        {"$group": {"_id": "$train", "count": {"$sum": 1}}}
-    ]
-    agg_results = list(Booking.objects.aggregate(*pipeline))
-    confirmed_counts = {res['_id']: res['count'] for res in agg_results}
+    # One indexed lookup on (train, journey_date); trains without a run yet are fully available
+    runs = TrainRun.objects(train__in=train_ids, journey_date=journey_date) \
+        .only('train', 'confirmed_count').read_preference(secondary_reads()).as_pymongo()
+    confirmed_counts = {run['train']: run.get('confirmed_count', 0) for run in runs}
 
     for train in trains:
         count = confirmed_counts.get(train.pk, 0)
         train.available_seats = train.total_seats - count
         train.travel_time = calculate_travel_time(train.departure_time, train.arrival_time)
             
-    return render_template('results.html', trains=trains, source=source, destination=destination)
+    return render_template('results.html', trains=trains, source=source, destination=destination,
+                           journey_date=journey_date)
 
 @main_bp.route('/train_route/<train_id>')
 def train_route(train_id):
     """Displays the specific route stops for a train."""
-    train = Train.objects.get_or_404(id=train_id)
+    train = Train.objects.read_preference(secondary_reads()).get_or_404(id=train_id)
     return render_template('train_route.html', train=train)
 
 @main_bp.route('/train_route_check')
@@ -64,11 +69,26 @@ def train_route_check():
     query = request.args.get('train_query')
     if not query: 
         return redirect(url_for('main.index'))
-    train = Train.objects(train_name__iexact=query).first() or \
-            Train.objects(train_name__icontains=query).first()
-    
+    # Exact name first (the database catches trains newer than this worker's index),
+    # then the prefix index instead of an unanchored regex scan
+    match = suggest_index.exact_train(query)
+    if match:
+        return redirect(url_for('main.train_route', train_id=match['id']))
+    train = Train.objects(train_name__iexact=query).first()
     if train:
         return redirect(url_for('main.train_route', train_id=train.id))
-    else:
-        flash(f'No train found matching "{query}".', 'danger')
-        return redirect(url_for('main.index'))
\ No newline at end of file
+    matches = suggest_index.lookup(query, kind='train', limit=1)
+    if matches:
+        return redirect(url_for('main.train_route', train_id=matches[0]['id']))
+    flash(f'No train found matching "{query}".', 'danger')
+    return redirect(url_for('main.index'))
+
+@main_bp.route('/suggest')
+def suggest():
+    """Returns ranked train and station name matches for autocomplete."""
+    query = request.args.get('q', '')
+    kind = request.args.get('type')
+    if kind not in ('train', 'station'):
+        kind = None
+    limit = max(0, min(request.args.get('limit', 8, type=int), 10))
+    return jsonify(query=query, results=suggest_index.lookup(query, kind=kind, limit=limit))
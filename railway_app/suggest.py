@@ -0,0 +1,113 @@
+import threading
+import time
+from models import Train
+
+MAX_PREFIX_LENGTH = 20
+MAX_RESULTS_PER_PREFIX = 10
+# Seconds between checks for trains added by other worker processes
+GENERATION_CHECK_SECONDS = 5
+
+class SuggestIndex:
+    """In-memory prefix index over train names and station names.
+
+    Every prefix of a label, and of each later word in it, maps to a pre-ranked
+    list of matches, so a lookup is a single dict access instead of a regex scan.
+    Each worker process keeps its own copy and rebuilds it when the trains
+    collection's size or newest _id changes.
+    """
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._prefixes = {}
+        self._exact_trains = {}
+        self._built_at = None
+        self._generation = None
+        self._checked_at = None
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def _current_generation():
+        trains = Train._get_collection()
+        newest = trains.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        return trains.estimated_document_count(), newest and newest['_id']
+
+    def refresh(self):
+        """Rebuilds the index from the trains collection."""
+        generation = self._current_generation()
+        trains = Train.objects.only('train_name', 'source', 'destination', 'route_stops').as_pymongo()
+        station_weights = {}
+        entries = []
+        for train in trains:
+            entries.append(({'label': train['train_name'], 'type': 'train', 'id': str(train['_id'])}, 1))
+            stations = [train['source'], train['destination']]
+            stations += [stop['stop_name'] for stop in train.get('route_stops', [])]
+            for station in set(stations):
+                station_weights[station] = station_weights.get(station, 0) + 1
+        # Stations served by more trains rank higher
+        entries += [({'label': name, 'type': 'station'}, weight) for name, weight in station_weights.items()]
+
+        candidates = {}
+        for entry, weight in entries:
+            words = entry['label'].lower().split()
+            # Rank 0 matches the start of the label, rank 1 the start of a later word
+            starts = [(' '.join(words), 0)] + [(word, 1) for word in words[1:]]
+            seen = set()
+            for text, rank in starts:
+                for end in range(1, min(len(text), MAX_PREFIX_LENGTH) + 1):
+                    prefix = text[:end]
+                    if prefix in seen:
+                        continue
+                    seen.add(prefix)
+                    match = (rank, -weight, entry['label'], entry)
+                    for kind in (None, entry['type']):
+                        candidates.setdefault((kind, prefix), []).append(match)
+
+        # The deepest prefixes keep every match so longer queries can be filtered without a scan
+        ranked = {key: [m[3] for m in sorted(matches, key=lambda m: m[:3])
+                        [:None if len(key[1]) == MAX_PREFIX_LENGTH else MAX_RESULTS_PER_PREFIX]]
+                  for key, matches in candidates.items()}
+        exact_trains = {}
+        for entry, _ in entries:
+            if entry['type'] == 'train':
+                exact_trains.setdefault(' '.join(entry['label'].lower().split()), entry)
+        self._prefixes = ranked
+        self._exact_trains = exact_trains
+        self._generation = generation
+        self._built_at = self._checked_at = time.monotonic()
+
+    def _is_stale(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds:
+            return True
+        if time.monotonic() - self._checked_at < GENERATION_CHECK_SECONDS:
+            return False
+        # A train added through another worker changes the count or the newest _id
+        self._checked_at = time.monotonic()
+        return self._current_generation() != self._generation
+
+    def _ensure_fresh(self):
+        # Only the first build blocks; later checks and rebuilds happen in one thread while others read the old index
+        if self._refresh_lock.acquire(blocking=self._built_at is None):
+            try:
+                if self._is_stale():
+                    self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def exact_train(self, name):
+        """Returns the train whose full name matches case-insensitively, or None."""
+        self._ensure_fresh()
+        return self._exact_trains.get(' '.join(name.lower().split()))
+
+    def lookup(self, query, kind=None, limit=MAX_RESULTS_PER_PREFIX):
+        """Returns ranked matches for a prefix, optionally filtered to 'train' or 'station'."""
+        query = ' '.join(query.lower().split())
+        if not query or limit <= 0:
+            return []
+        self._ensure_fresh()
+        matches = self._prefixes.get((kind, query[:MAX_PREFIX_LENGTH]), [])
+        if len(query) > MAX_PREFIX_LENGTH:
+            # The index stops at MAX_PREFIX_LENGTH, so check the rest of a long query against each label
+            matches = [m for m in matches if f" {' '.join(m['label'].lower().split())}".find(f" {query}") >= 0]
+        return matches[:limit]
+
+suggest_index = SuggestIndex()
@@ -2,20 +2,23 @@ import time
 import random
 import string
 import math
-import qrcode
 import base64
 import tempfile
 import os
 from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from flask import render_template, make_response, current_app
-from flask_mail import Message
-from fpdf import FPDF
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.read_preferences import SecondaryPreferred
+from models import Train, TrainRun, Booking
 
-# Import initialized mail instance from factory
-from . import mail 
+# Mail is initialized lazily by the factory; qrcode, fpdf and flask_mail are imported on first use
+from . import get_mail
+from .admission import booking_admission
 
 BASE_FARE = 1000
+BOOKING_ARCHIVE = 'booking_archive'
+TRAIN_RUN_ARCHIVE = 'train_run_archive'
 SEATS_PER_COACH = {'Sleeper': 72, 'AC 3 Tier': 64, 'AC 2 Tier': 46, 'AC 1st Class': 18}
 
 def calculate_travel_time(departure_time_str, arrival_time_str):
@@ -54,7 +57,319 @@ def generate_seat_number(booking_count, total_seats, seat_class):
     berth = options[(seat_in_coach - 1) % len(options)]
     return f"{seat_class[0].upper()}{coach_number}-{seat_in_coach}-{berth}"
 
+def secondary_reads():
+    """Read preference for staleness-tolerant pages: secondaries within the configured lag, else the primary."""
+    return SecondaryPreferred(max_staleness=current_app.config['MONGODB_MAX_STALENESS_SECONDS'])
+
+def parse_journey_date(value):
+    """Parses a YYYY-MM-DD form value; missing means today, while bad input or a past date returns None."""
+    if not value:
+        return date.today()
+    try:
+        journey_date = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return journey_date if journey_date >= date.today() else None
+
+def seat_index_from_label(seat_number, seat_class):
+    """Inverts generate_seat_number, returning the run-wide seat index or None for other labels."""
+    try:
+        coach, seat, _ = seat_number.split('-')
+        return (int(coach[1:]) - 1) * SEATS_PER_COACH.get(seat_class, 72) + int(seat)
+    except (AttributeError, ValueError):
+        return None
+
+def _claim_confirmed(run):
+    """Takes a released seat if there is one, else the next unused seat. Returns its index or None."""
+    claimed = TrainRun.objects(pk=run.pk, confirmed_count__lt=run.total_seats,
+                               __raw__={'released_seats.0': {'$exists': True}}).modify(
+        pop__released_seats=-1, inc__confirmed_count=1)
+    if claimed:
+        return claimed.released_seats[0]
+    # With no released seats, seats 1..confirmed_count are all taken
+    claimed = TrainRun.objects(pk=run.pk, confirmed_count__lt=run.total_seats,
+                               __raw__={'released_seats.0': {'$exists': False}}).modify(
+        inc__confirmed_count=1, new=True)
+    return claimed.confirmed_count if claimed else None
+
+def reserve_seat(run, seat_class):
+    """Atomically claims the next Confirmed, RAC or Waitlist slot on a train run.
+    Returns None once the waitlist cap is reached."""
+    seat_index = _claim_confirmed(run)
+    if seat_index is None and TrainRun.objects(pk=run.pk, confirmed_count__lt=run.total_seats).count():
+        # A seat was released between the two attempts above
+        seat_index = _claim_confirmed(run)
+    if seat_index is not None:
+        return 'Confirmed', generate_seat_number(seat_index, run.total_seats, seat_class)
+
+    claimed = TrainRun.objects(pk=run.pk, rac_count__lt=run.rac_capacity).modify(
+        inc__rac_count=1, inc__rac_issued=1, new=True)
+    if claimed:
+        return 'RAC', f"RAC-{claimed.rac_issued}"
+
+    claimed = TrainRun.objects(pk=run.pk, waitlist_count__lt=current_app.config['WAITLIST_CAP']).modify(
+        inc__waitlist_count=1, inc__waitlist_issued=1, new=True)
+    if claimed:
+        return 'Waitlisted', f"WL-{claimed.waitlist_issued}"
+    return None
+
+RUN_COUNTERS = {'Confirmed': 'confirmed_count', 'RAC': 'rac_count', 'Waitlisted': 'waitlist_count'}
+
+def _promote(run_id, from_status, to_status, label_for):
+    """Moves the earliest booking with from_status on a run up to to_status.
+    Returns the booking as it was before the move, or None if there was nobody to promote."""
+    bookings = Booking._get_collection()
+    while True:
+        doc = bookings.find_one({'run': run_id, 'status': from_status}, sort=[('_id', 1)])
+        if doc is None:
+            return None
+        # The status condition makes concurrent releases pick different passengers
+        moved = bookings.update_one({'_id': doc['_id'], 'status': from_status},
+                                    {'$set': {'status': to_status, 'seat_number': label_for(doc)}})
+        if moved.modified_count:
+            return doc
+
+def _free_place(run, status, seat_number, seat_class):
+    """Hands a cancelled booking's place to the next RAC or waitlisted passenger,
+    and returns it to the run's counters only when nobody is waiting for it."""
+    runs = TrainRun._get_collection()
+    if status == 'Confirmed':
+        seat_index = seat_index_from_label(seat_number, seat_class)
+        promoted = seat_index and _promote(
+            run['_id'], 'RAC', 'Confirmed',
+            lambda doc: generate_seat_number(seat_index, run['total_seats'], doc.get('seat_class')))
+        if not promoted:
+            update = {'$inc': {'confirmed_count': -1}}
+            if seat_index:
+                update['$push'] = {'released_seats': seat_index}
+            runs.update_one({'_id': run['_id']}, update)
+            return
+        # The promoted passenger's RAC place is now the one being freed
+        status, seat_number = 'RAC', promoted['seat_number']
+    if status == 'RAC':
+        if not _promote(run['_id'], 'Waitlisted', 'RAC', lambda doc: seat_number):
+            runs.update_one({'_id': run['_id']}, {'$inc': {'rac_count': -1}})
+            return
+        status = 'Waitlisted'
+    if status == 'Waitlisted':
+        runs.update_one({'_id': run['_id']}, {'$inc': {'waitlist_count': -1}})
+
+def release_bookings(bookings):
+    """Deletes the given Booking queryset. Each freed place goes to the earliest RAC or
+    waitlisted passenger on the run, so nobody is overtaken by later bookings."""
+    collection = Booking._get_collection()
+    runs = TrainRun._get_collection()
+    for booking_id in bookings.distinct('id'):
+        # Deleting returns the current status, which an earlier release in this loop may have promoted
+        doc = collection.find_one_and_delete({'_id': booking_id}, ['run', 'status', 'seat_class', 'seat_number'])
+        if not doc:
+            continue
+        run = runs.find_one({'_id': doc.get('run')}, {'train': 1, 'journey_date': 1, 'total_seats': 1})
+        if not run:
+            continue
+        _free_place(run, doc.get('status'), doc.get('seat_number'), doc.get('seat_class'))
+        booking_admission.clear_sold_out(str(run['train']), run['journey_date'].date())
+
+def _label_number(seat_number):
+    try:
+        return int(seat_number.rsplit('-', 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def backfill_runs(journey_date):
+    """Attaches bookings that predate train runs to a run per train on the given date,
+    then renumbers confirmed seats in booking order and recounts every touched run.
+    Safe to re-run."""
+    bookings = Booking._get_collection()
+    touched = set()
+    for train_id in bookings.distinct('train', {'run': None}):
+        train = Train.objects(pk=train_id).first()
+        if not train:
+            continue
+        run = TrainRun.for_date(train, journey_date)
+        bookings.update_many({'train': train_id, 'run': None}, {'$set': {
+            'run': run.pk, 'journey_date': datetime.combine(journey_date, datetime.min.time())}})
+        touched.add(run.pk)
+
+    runs = TrainRun._get_collection()
+    for run_id in touched:
+        run = runs.find_one({'_id': run_id})
+        counts = {counter: 0 for counter in RUN_COUNTERS.values()}
+        issued = {'RAC': 0, 'Waitlisted': 0}
+        renumbered = []
+        for doc in bookings.find({'run': run_id}, ['status', 'seat_class', 'seat_number']).sort('_id', 1):
+            status = doc.get('status')
+            if status not in RUN_COUNTERS:
+                continue
+            counts[RUN_COUNTERS[status]] += 1
+            if status == 'Confirmed':
+                # Legacy seat numbers were counted per train across all dates and can collide
+                seat_number = generate_seat_number(counts['confirmed_count'], run['total_seats'], doc.get('seat_class'))
+                renumbered.append(UpdateOne({'_id': doc['_id']}, {'$set': {'seat_number': seat_number}}))
+            else:
+                issued[status] = max(issued[status], _label_number(doc.get('seat_number')), counts[RUN_COUNTERS[status]])
+        if renumbered:
+            bookings.bulk_write(renumbered)
+        runs.update_one({'_id': run_id}, {'$set': dict(counts, released_seats=[], rac_issued=issued['RAC'],
+                                                       waitlist_issued=issued['Waitlisted'])})
+    return len(touched)
+
+def archive_runs(before):
+    """Moves runs departing before the given date, and their bookings, to cold collections.
+    Copies are upserted before the hot documents are deleted, so an interrupted job can be re-run."""
+    bookings = Booking._get_collection()
+    runs = TrainRun._get_collection()
+    cold = bookings.database
+    archived = 0
+    for run in runs.find({'journey_date': {'$lt': datetime.combine(before, datetime.min.time())}}):
+        docs = list(bookings.find({'run': run['_id']}))
+        if docs:
+            cold[BOOKING_ARCHIVE].bulk_write([ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs])
+            bookings.delete_many({'run': run['_id']})
+        cold[TRAIN_RUN_ARCHIVE].replace_one({'_id': run['_id']}, run, upsert=True)
+        runs.delete_one({'_id': run['_id']})
+        archived += 1
+    return archived
+
+def find_booking(pnr, read_preference=None):
+    """Returns the booking for a PNR, falling back to the archive for journeys that have been archived."""
+    bookings = Booking.objects(pnr_number=pnr)
+    if read_preference:
+        bookings = bookings.read_preference(read_preference)
+    booking = bookings.first()
+    if booking is None:
+        archived = Booking._get_collection().database[BOOKING_ARCHIVE].find_one({'pnr_number': pnr})
+        booking = Booking._from_son(archived) if archived else None
+    return booking
+
+def ticket_from_booking(booking, train=None):
+    """Flattens a Booking (document or raw dict) into the plain ticket dict used by the PDF layout."""
+    get = booking.get if isinstance(booking, dict) else lambda field: getattr(booking, field)
+    train = train or booking.train
+    return {
+        'pnr': get('pnr_number'), 'passenger_name': get('passenger_name'),
+        'passenger_age': get('passenger_age'), 'berth_preference': get('berth_preference'),
+        'status': get('status'), 'seat_class': get('seat_class'), 'seat_number': get('seat_number'),
+        'fare': get('fare') or 0.0, 'journey_date': get('journey_date'), 'train_name': train.train_name,
+        'source': train.source, 'destination': train.destination, 'departure_time': train.departure_time
+    }
+
+def render_ticket_pdf(ticket):
+    """Renders the single-page e-ticket for a ticket dict and returns the FPDF document."""
+    from fpdf import FPDF
+
+    # Restored Original PDF Settings from app.py
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    
+    BLUE_HEADER = (13, 71, 161)
+    TEXT_COLOR = (50, 50, 50)
+    GREEN_PRICE = (46, 125, 50)
+    
+    # Blue Header Rectangle
+    pdf.set_fill_color(*BLUE_HEADER)
+    pdf.rect(10, 10, 190, 30, 'F')
+    
+    # Header Text
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font("Arial", "B", 20)
+    pdf.set_xy(20, 20)
+    pdf.cell(0, 0, "RAILWAY E-TICKET")
+    journey = f"{ticket['journey_date']:%d %b %Y}, " if ticket['journey_date'] else ""
+    pdf.set_font("Arial", "", 11)
+    pdf.set_xy(20, 30)
+    pdf.cell(0, 0, f"Journey: {journey}departs {ticket['departure_time']}")
+    
+    # PNR Section
+    pdf.set_font("Arial", "", 12)
+    pdf.set_xy(140, 18)
+    pdf.cell(50, 5, "PNR NUMBER", 0, 1, 'R')
+    pdf.set_font("Arial", "B", 16)
+    pdf.set_xy(140, 24)
+    pdf.cell(50, 5, ticket['pnr'], 0, 1, 'R')
+    
+    # Main Content Border
+    pdf.set_draw_color(200, 200, 200)
+    pdf.rect(10, 40, 190, 110)
+    
+    pdf.set_text_color(*TEXT_COLOR)
+    y_start = 55
+    x_left = 20
+    
+    # Passenger Details Section
+    pdf.set_font("Arial", "B", 12)
+    pdf.set_xy(x_left, y_start)
+    pdf.set_text_color(*BLUE_HEADER)
+    pdf.cell(0, 10, "PASSENGER DETAILS")
+    pdf.line(x_left, y_start+8, 90, y_start+8)
+    
+    pdf.set_text_color(*TEXT_COLOR)
+    details_left = [
+        ("Name", ticket['passenger_name']),
+        ("Age", f"{ticket['passenger_age']} Years"),
+        ("Berth", ticket['berth_preference'] or 'No Preference'),
+        ("Status", ticket['status'])
+    ]
+    
+    y_pos = y_start + 15
+    for label, value in details_left:
+        pdf.set_font("Arial", "B", 10)
+        pdf.set_xy(x_left, y_pos)
+        pdf.cell(30, 6, f"{label}:")
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(40, 6, str(value))
+        y_pos += 8
+
+    # Journey Details Section
+    x_right = 110
+    pdf.set_font("Arial", "B", 12)
+    pdf.set_xy(x_right, y_start)
+    pdf.set_text_color(*BLUE_HEADER)
+    pdf.cell(0, 10, "JOURNEY DETAILS")
+    pdf.line(x_right, y_start+8, 180, y_start+8)
+    
+    pdf.set_text_color(*TEXT_COLOR)
+    details_right = [
+        ("Train", ticket['train_name']),
+        ("Route", f"{ticket['source']} -> {ticket['destination']}"),
+        ("Class", ticket['seat_class']),
+        ("Seat No", ticket['seat_number'] or 'Allocated later')
+    ]
+    
+    y_pos = y_start + 15
+    for label, value in details_right:
+        pdf.set_font("Arial", "B", 10)
+        pdf.set_xy(x_right, y_pos)
+        pdf.cell(30, 6, f"{label}:")
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(40, 6, str(value))
+        y_pos += 8
+        
+    # QR Code handling (using original temp file logic)
+    qr_data = f"PNR:{ticket['pnr']}|{ticket['passenger_name']}|{ticket['train_name']}"
+    qr_base64 = generate_qr_code(qr_data)
+    qr_bytes = base64.b64decode(qr_base64)
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_qr:
+        temp_qr.write(qr_bytes)
+        temp_qr_path = temp_qr.name
+    
+    pdf.image(temp_qr_path, x=85, y=105, w=35)
+    os.remove(temp_qr_path)
+    
+    # Fare Footer
+    pdf.set_fill_color(240, 240, 240)
+    pdf.rect(11, 138, 188, 11, 'F')
+    pdf.set_xy(10, 140)
+    pdf.set_font("Arial", "B", 12)
+    pdf.set_text_color(*GREEN_PRICE)
+    # FIX: Changed ₹ to Rs. to avoid encoding error
+    pdf.cell(190, 8, f"TOTAL FARE: Rs. {ticket['fare']:.2f}", 0, 0, 'C')
+
+    return pdf
+
 def generate_qr_code(data):
+    import qrcode
     qr = qrcode.QRCode(version=1, box_size=10, border=4)
     qr.add_data(data)
     qr.make(fit=True)
@@ -65,13 +380,14 @@ def generate_qr_code(data):
 def send_ticket_email(user_email, ticket_data):
     """Sends ticket confirmation email using Flask-Mail with an explicit sender."""
     try:
+        from flask_mail import Message
         msg = Message(
             subject=f"Ticket Confirmation: #{ticket_data['pnr']}",
             sender=current_app.config['MAIL_USERNAME'], # Fix: Explicitly set sender
             recipients=[user_email]
         )
         msg.html = render_template('ticket_email.html', ticket=ticket_data)
-        mail.send(msg)
+        get_mail().send(msg)
         return True
     except Exception as e:
         print(f"Mail Error: {e}")
@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from railway_app.admission import AdmissionRejected, BookingAdmission, TokenBucket
+
+JOURNEY = date(2030, 1, 1)
+
+def make_admission(**overrides):
+    config = {'BOOKING_RATE_PER_TRAIN': 100.0, 'BOOKING_BURST_PER_TRAIN': 100,
+              'BOOKING_CONCURRENCY_PER_TRAIN': 1, 'BOOKING_QUEUE_PER_TRAIN': 2,
+              'BOOKING_QUEUE_TIMEOUT': 2.0, 'BOOKING_MAX_CONCURRENCY': 4,
+              'BOOKING_MAX_WAITING': 2, 'BOOKING_SOLD_OUT_TTL': 30}
+    config.update(overrides)
+    admission = BookingAdmission()
+    admission.configure(config)
+    return admission
+
+class Holder:
+    """Holds an admission slot on a background thread until released."""
+
+    def __init__(self, admission, train_id):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(admission, train_id), daemon=True)
+        self.thread.start()
+
+    def _run(self, admission, train_id):
+        try:
+            with admission.admit(train_id, JOURNEY):
+                self.entered.set()
+                self.release.wait(5)
+        except AdmissionRejected as e:
+            self.error = e
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.01)
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+    time.sleep(0.1)
+    assert bucket.take()
+
+def test_rate_limit_rejects_once_burst_is_spent():
+    admission = make_admission(BOOKING_RATE_PER_TRAIN=0.001, BOOKING_BURST_PER_TRAIN=1)
+    with admission.admit('A', JOURNEY):
+        pass
+    with pytest.raises(AdmissionRejected, match='High demand'):
+        with admission.admit('A', JOURNEY):
+            pass
+    # Other trains have their own bucket
+    with admission.admit('B', JOURNEY):
+        pass
+
+def test_busy_train_does_not_block_other_trains():
+    admission = make_admission()
+    running = Holder(admission, 'A')
+    assert running.entered.wait(2)
+    queued = [Holder(admission, 'A') for _ in range(2)]
+    lane = admission._lane('A')
+    wait_until(lambda: lane.waiting == 2)
+
+    with pytest.raises(AdmissionRejected, match='queue for this train is full'):
+        with admission.admit('A', JOURNEY):
+            pass
+    # Train A's queued requests use the whole waiting budget, but B has a free slot
+    with admission.admit('B', JOURNEY):
+        pass
+
+    running.finish()
+    for holder in queued:
+        assert holder.entered.wait(2)
+        holder.finish()
+        assert holder.error is None
+
+def test_waiting_budget_is_shared_across_trains():
+    admission = make_admission(BOOKING_MAX_WAITING=1, BOOKING_QUEUE_TIMEOUT=0.2)
+    holders = [Holder(admission, 'A'), Holder(admission, 'B')]
+    for holder in holders:
+        assert holder.entered.wait(2)
+    queued = Holder(admission, 'A')
+    wait_until(lambda: admission._lane('A').waiting == 1)
+
+    with pytest.raises(AdmissionRejected, match='busy'):
+        with admission.admit('B', JOURNEY):
+            pass
+    queued.thread.join(2)
+    assert 'timed out' in str(queued.error)
+    for holder in holders:
+        holder.finish()
+
+def test_global_cap_waits_then_rejects():
+    admission = make_admission(BOOKING_MAX_CONCURRENCY=1, BOOKING_QUEUE_TIMEOUT=0.2)
+    running = Holder(admission, 'A')
+    assert running.entered.wait(2)
+    with pytest.raises(AdmissionRejected, match='busy'):
+        with admission.admit('B', JOURNEY):
+            pass
+    running.finish()
+    # The rejected request gave back its lane slot
+    with admission.admit('B', JOURNEY):
+        pass
+
+def test_sold_out_entries_expire_and_clear():
+    admission = make_admission(BOOKING_SOLD_OUT_TTL=0.1)
+    admission.mark_sold_out('A', JOURNEY)
+    with pytest.raises(AdmissionRejected, match='sold out'):
+        with admission.admit('A', JOURNEY):
+            pass
+    time.sleep(0.15)
+    assert not admission.is_sold_out('A', JOURNEY)
+
+    admission.mark_sold_out('A', JOURNEY)
+    admission.clear_sold_out('A', JOURNEY)
+    assert not admission.is_sold_out('A', JOURNEY)
@@ -0,0 +1,27 @@
+import pytest
+from pymongo.read_preferences import SecondaryPreferred
+
+from config import Config
+from railway_app import create_app
+from railway_app.utils import secondary_reads
+
+def test_secondary_reads_prefer_secondaries_within_staleness_bound():
+    app = create_app()
+    with app.app_context():
+        preference = secondary_reads()
+        assert isinstance(preference, SecondaryPreferred)
+        # This is what the driver sends with each read, so servers outside the bound are skipped
+        assert preference.document == {'mode': 'secondaryPreferred',
+                                       'maxStalenessSeconds': Config.MONGODB_MAX_STALENESS_SECONDS}
+
+@pytest.mark.parametrize('staleness', [0, 30, 89])
+def test_create_app_rejects_staleness_below_mongodb_minimum(monkeypatch, staleness):
+    monkeypatch.setattr(Config, 'MONGODB_MAX_STALENESS_SECONDS', staleness)
+    with pytest.raises(ValueError, match='MONGODB_MAX_STALENESS_SECONDS'):
+        create_app()
+
+@pytest.mark.parametrize('staleness', [-1, 90, 300])
+def test_create_app_accepts_valid_staleness(monkeypatch, staleness):
+    monkeypatch.setattr(Config, 'MONGODB_MAX_STALENESS_SECONDS', staleness)
+    with create_app().app_context():
+        assert secondary_reads().max_staleness == staleness